@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'budowlanka_project.settings')
 
 application = get_asgi_application()
+
+# Send 103 Early Hints with the preload links of public pages
+from mainapp.hints import EarlyHintsMiddleware  # noqa: E402
+
+application = EarlyHintsMiddleware(application)
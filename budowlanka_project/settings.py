@@ -65,11 +65,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'mainapp.middleware.DatabaseRoutingMiddleware',
+    'mainapp.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'mainapp.middleware.AuthenticationMiddleware',
+    'mainapp.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -103,6 +104,45 @@ DATABASES = {
     }
 }
 
+# Read replicas, e.g. DATABASE_REPLICAS=replica for a local SQLite copy (replica.sqlite3)
+# kept in sync with `python manage.py replicate --interval 2`. For a server database
+# replace the entries with real replica connections.
+DATABASE_REPLICAS = env.list('DATABASE_REPLICAS', default=[])
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / f'{alias}.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['mainapp.routers.PrimaryReplicaRouter']
+
+# Views whose reads may be served by a replica (see mainapp/routers.py)
+REPLICA_READ_VIEWS = {
+    'mainapp:blog',
+    'mainapp:blog_day',
+    'mainapp:archive',
+    'mainapp:detail',
+    'mainapp:api_realization_list',
+    'mainapp:api_realization_detail',
+}
+REPLICA_STICKY_SECONDS = 10  # Reads stay on the primary after a write; keep above the replication lag
+REPLICA_HEALTH_CHECK_INTERVAL = 10  # Seconds between replica health checks
+
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Shared by all worker processes, so invalidation on save reaches every worker
+# (archive counts are cached without expiry). With memcached available use
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache and
+# CACHE_LOCATION=127.0.0.1:11211.
+
+CACHES = {
+    'default': {
+        'BACKEND': env('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': env('CACHE_LOCATION', default=os.path.join(BASE_DIR, 'cache', 'django')),
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -139,12 +179,48 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'mainapp', 'media')
 
+# Uploads are always streamed to a temporary file on disk
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB, also the in-memory limit for optimized images
+
+# Upload-time optimization of photos (see mainapp/images.py)
+IMAGE_MAX_DIMENSION = 2560  # Longest side in pixels
+IMAGE_JPEG_QUALITY = 85  # Used when a JPEG has to be resized or rotated
+
+# Persistent thumbnail cache shared by image consumers (e.g. the PDF catalogue)
+THUMBNAIL_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'thumbnails')
+THUMBNAIL_JPEG_QUALITY = 75
+THUMBNAIL_WORKERS = os.cpu_count() or 1  # Processes decoding missing thumbnails
+
+# Resumable chunked photo uploads in the Realization admin
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'tmp', 'uploads')  # Partial files
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB, a dropped connection loses at most one chunk
+CHUNKED_UPLOAD_MAX_SIZE = 50 * 1024 * 1024  # 50 MB per file
+CHUNKED_UPLOAD_EXPIRY = 24 * 60 * 60  # Abandoned partial files are removed after a day
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Our settings.
+# Sessions are only used by the admin; signed cookies keep them out of the database
+SESSION_ENGINE = env('SESSION_ENGINE', default='django.contrib.sessions.backends.signed_cookies')
+
+# Public read-only views served without session, auth and message processing
+# to anonymous visitors (see mainapp/middleware.py)
+SESSIONLESS_VIEWS = {
+    'mainapp:index',
+    'mainapp:blog',
+    'mainapp:blog_day',
+    'mainapp:archive',
+    'mainapp:detail',
+    'mainapp:api_realization_list',
+    'mainapp:api_realization_detail',
+}
+
 LOGIN_REDIRECT_URL = 'mainapp:index'
 LOGOUT_REDIRECT_URL = 'mainapp:index'
 LOGIN_URL = 'accounts:login'
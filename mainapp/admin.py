@@ -1,12 +1,44 @@
+from django.conf import settings
 from django.contrib import admin
+from django.utils.decorators import method_decorator
+from .images import get_thumbnails
 from .models import Realization, RealizationImage
-from django.http import HttpResponse
+from .uploads import ChunkedUpload, UploadError
+from django.core.exceptions import PermissionDenied
+from django.core.files import File
+from django.http import HttpResponse, JsonResponse
+from django.urls import path, reverse
+from django.views.decorators.http import require_http_methods
+from PIL import Image
 from reportlab.pdfgen import canvas
+from urllib.parse import unquote
 import io
+import os
+import logging
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import simpleSplit
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.pdfbase import pdfmetrics
 
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+# Catalogue layout, in points
+CATALOGUE_MARGIN = 50
+CATALOGUE_MAIN_IMAGE_HEIGHT = 300
+CATALOGUE_GRID_COLUMNS = 3
+CATALOGUE_GRID_GAP = 10
+# Longest side of images embedded in the catalogue, in pixels (about 150 dpi at full width)
+CATALOGUE_IMAGE_SIZE = 1000
+
+CALIBRI_PATH = os.path.join(os.path.dirname(__file__), 'static', 'mainapp', 'calibri.ttf')
+
+
+def register_fonts():
+    """Register the Calibri font used in PDF exports, once per process."""
+    if 'Calibri' not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont('Calibri', CALIBRI_PATH))
+
 
 # Mixin class to add PDF export functionality
 class ExportPDFMixin:
@@ -19,7 +51,7 @@ class ExportPDFMixin:
         p = canvas.Canvas(buffer, pagesize=letter)
 
         # Register font Calibri
-        pdfmetrics.registerFont(TTFont('Calibri', 'mainapp/static/mainapp/calibri.ttf'))
+        register_fonts()
         p.setFont('Calibri', 12)
 
         model = self.get_model(queryset)
@@ -41,6 +73,104 @@ class ExportPDFMixin:
 
     export_to_pdf.short_description = "Export to PDF"
 
+    def export_catalogue_to_pdf(self, request, queryset):
+        """
+        Export realizations as an illustrated catalogue.
+
+        Each realization starts a new page with its title, date, description,
+        main image and a grid of its photos. Images are embedded as downscaled
+        JPEGs from the thumbnail cache; a file used several times is stored in
+        the PDF once.
+        """
+        realizations = list(queryset.prefetch_related('images'))
+        paths = []
+        for obj in realizations:
+            if obj.image:
+                paths.append(obj.image.path)
+            paths.extend(img.image.path for img in obj.images.all())
+        thumbnails = get_thumbnails(paths, CATALOGUE_IMAGE_SIZE)
+        sizes = {}
+        for thumbnail in set(thumbnails.values()):
+            with Image.open(thumbnail) as image:
+                sizes[thumbnail] = image.size
+
+        buffer = io.BytesIO()
+        p = canvas.Canvas(buffer, pagesize=letter)
+        for obj in realizations:
+            main = thumbnails.get(obj.image.path) if obj.image else None
+            photos = [thumbnails[img.image.path] for img in obj.images.all() if img.image.path in thumbnails]
+            self.draw_catalogue_entry(p, obj, main, photos, sizes)
+            p.showPage()
+        p.save()
+
+        buffer.seek(0)
+        logger.info(f"Wygenerowano katalog PDF ({len(realizations)} realizacji)")
+        response = HttpResponse(buffer, content_type='application/pdf')
+        response['Content-Disposition'] = 'attachment; filename="catalogue.pdf"'
+        return response
+
+    export_catalogue_to_pdf.short_description = "Export catalogue to PDF"
+
+    def draw_catalogue_entry(self, p, obj, main, photos, sizes):
+        """
+        Draw one realization of the catalogue, continuing on new pages when needed.
+
+        Args:
+            p (Canvas): The PDF canvas.
+            obj (Realization): The realization.
+            main (str): Thumbnail of the main image or None.
+            photos (list): Thumbnails of the additional photos.
+            sizes (dict): Thumbnail path -> (width, height) in pixels.
+        """
+        register_fonts()
+        page_width, page_height = letter
+        width = page_width - 2 * CATALOGUE_MARGIN
+        y = page_height - CATALOGUE_MARGIN
+
+        def ensure_space(height):
+            nonlocal y
+            if y - height < CATALOGUE_MARGIN:
+                p.showPage()
+                y = page_height - CATALOGUE_MARGIN
+
+        def draw_fitted(path, x, top, box_width, box_height):
+            # Scale the image into the box, keeping its aspect ratio
+            image_width, image_height = sizes[path]
+            scale = min(box_width / image_width, box_height / image_height)
+            p.drawImage(path, x, top - image_height * scale, image_width * scale, image_height * scale)
+            return image_height * scale
+
+        p.setFont('Calibri', 18)
+        for line in simpleSplit(obj.title, 'Calibri', 18, width):
+            ensure_space(22)
+            y -= 22
+            p.drawString(CATALOGUE_MARGIN, y, line)
+        p.setFont('Calibri', 10)
+        y -= 16
+        p.drawString(CATALOGUE_MARGIN, y, f"Data: {obj.date.strftime('%Y-%m-%d')}")
+        y -= 10
+
+        p.setFont('Calibri', 11)
+        for paragraph in obj.content.splitlines() or ['']:
+            for line in simpleSplit(paragraph, 'Calibri', 11, width) or ['']:
+                ensure_space(14)
+                y -= 14
+                p.drawString(CATALOGUE_MARGIN, y, line)
+        y -= CATALOGUE_GRID_GAP
+
+        if main:
+            ensure_space(CATALOGUE_MAIN_IMAGE_HEIGHT)
+            y -= draw_fitted(main, CATALOGUE_MARGIN, y, width, CATALOGUE_MAIN_IMAGE_HEIGHT) + CATALOGUE_GRID_GAP
+
+        cell_width = (width - (CATALOGUE_GRID_COLUMNS - 1) * CATALOGUE_GRID_GAP) / CATALOGUE_GRID_COLUMNS
+        cell_height = cell_width * 3 / 4
+        for start in range(0, len(photos), CATALOGUE_GRID_COLUMNS):
+            ensure_space(cell_height)
+            for column, photo in enumerate(photos[start:start + CATALOGUE_GRID_COLUMNS]):
+                x = CATALOGUE_MARGIN + column * (cell_width + CATALOGUE_GRID_GAP)
+                draw_fitted(photo, x, y, cell_width, cell_height)
+            y -= cell_height + CATALOGUE_GRID_GAP
+
 
 class RealizationImageInline(admin.TabularInline):
     model = RealizationImage
@@ -64,7 +194,84 @@ class RealizationAdmin(admin.ModelAdmin, ExportPDFMixin):
             'description': 'Pola powiązane z realizacją'
         }),
     )
-    actions = ['export_to_pdf']
+    actions = ['export_to_pdf', 'export_catalogue_to_pdf']
+
+    def get_urls(self):
+        # Endpoint for resumable chunked photo uploads from the change form
+        urls = [
+            path('<path:object_id>/upload/<str:upload_id>/',
+                 self.admin_site.admin_view(self.upload_chunk_view),
+                 name='mainapp_realization_upload'),
+        ]
+        return urls + super().get_urls()
+
+    def change_view(self, request, object_id, form_url='', extra_context=None):
+        extra_context = extra_context or {}
+        # The drop zone script substitutes UPLOAD_ID with the id of each file
+        extra_context['chunked_upload_url'] = reverse('admin:mainapp_realization_upload',
+                                                      args=[object_id, 'UPLOAD_ID'])
+        extra_context['chunked_upload_chunk_size'] = settings.CHUNKED_UPLOAD_CHUNK_SIZE
+        return super().change_view(request, object_id, form_url, extra_context)
+
+    @method_decorator(require_http_methods(["GET", "POST"]))
+    def upload_chunk_view(self, request, object_id, upload_id):
+        """
+        Receive one chunk of a photo (POST) or report how much was received (GET).
+
+        POST body is the raw chunk, described by ``Content-Range: bytes start-end/total``
+        and ``X-File-Name`` headers. When the last chunk arrives the file is attached
+        to the realization as a ``RealizationImage``.
+
+        Returns:
+            JsonResponse: Current offset, and ``image_id`` once complete.
+        """
+        obj = self.get_object(request, object_id)
+        if obj is None:
+            return JsonResponse({'error': "Realizacja nie istnieje"}, status=404)
+        if not self.has_change_permission(request, obj):
+            raise PermissionDenied
+
+        try:
+            upload = ChunkedUpload(obj.pk, upload_id)
+            with upload.locked():
+                status = upload.status()
+                if request.method == 'GET' or status.get('complete'):
+                    # A retry after a lost final response gets the image created the first time
+                    return JsonResponse(status)
+
+                offset = upload.write_chunk(request, request.headers.get('Content-Range'),
+                                            unquote(request.headers.get('X-File-Name', '')))
+                if not upload.is_complete:
+                    return JsonResponse({'offset': offset})
+                image = self.attach_upload(obj, upload)
+        except UploadError as e:
+            logger.error(f"Błąd przesyłania zdjęcia dla realizacji {object_id}: {e}")
+            return JsonResponse({'error': str(e), 'offset': e.offset}, status=e.status)
+
+        logger.info(f"Dodano zdjęcie {image.image.name} do realizacji {obj.pk}")
+        return JsonResponse({'offset': offset, 'complete': True, 'image_id': image.pk})
+
+    def attach_upload(self, obj, upload):
+        """
+        Save an assembled upload as a RealizationImage, mark it done and remove the partial file.
+
+        Raises:
+            UploadError: If the file is not a valid image.
+        """
+        meta = upload.read_meta()
+        try:
+            with open(upload.path, 'rb') as assembled:
+                try:
+                    Image.open(assembled).verify()
+                except Exception:
+                    raise UploadError("Plik nie jest obrazem")
+                assembled.seek(0)
+                image = RealizationImage(realization=obj, image=File(assembled, name=meta['name']))
+                image.save()
+            upload.mark_done(image.pk)
+        finally:
+            upload.discard()
+        return image
 
 
 # Register the models with their respective admin classes
@@ -0,0 +1,293 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition, require_http_methods
+
+from .models import Realization, RealizationImage
+from .routers import use_primary
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+API_VERSION = 'v1'
+CONTENT_VERSION_KEY = 'realization_api_content_version'
+CONTENT_CHANGED_KEY = 'realization_api_content_changed'
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Fields that can be requested with ``fields=``; ``images`` is not a column
+# and is loaded with a single extra query.
+COLUMN_FIELDS = ('id', 'title', 'content', 'date', 'image')
+ALL_FIELDS = COLUMN_FIELDS + ('images',)
+
+# Number of serialized entries sent to the client in one chunk
+STREAM_BATCH = 50
+
+
+class ApiError(Exception):
+    """Invalid request parameters; reported to the client as HTTP 400."""
+
+
+def content_version():
+    """
+    Return a token that changes whenever realizations or their images change.
+
+    Kept in the shared cache, so a change made in one worker reaches all of them.
+
+    Returns:
+        str: Current content version.
+    """
+    version = cache.get(CONTENT_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(CONTENT_VERSION_KEY, version, None)
+    return version
+
+
+def bump_content_version():
+    """Invalidate all API ETags after a change to the content."""
+    cache.set_many({CONTENT_VERSION_KEY: uuid.uuid4().hex, CONTENT_CHANGED_KEY: time.time()}, None)
+
+
+def changed_recently():
+    """
+    Check whether the content changed within ``REPLICA_STICKY_SECONDS``.
+
+    Replicas may not have the change yet, so a body read from them would be
+    stale while the ETag already carries the new content version.
+
+    Returns:
+        bool: True if the last change may not have reached the replicas.
+    """
+    changed = cache.get(CONTENT_CHANGED_KEY)
+    return changed is not None and time.time() - changed < settings.REPLICA_STICKY_SECONDS
+
+
+def realization_etag(request, *args, **kwargs):
+    """
+    Compute the ETag for an API response.
+
+    Runs before the view, so right after a change it also moves the request's
+    reads to the primary and the body matches the new ETag.
+
+    Returns:
+        str: Hash of the content version and the full request path.
+    """
+    if changed_recently():
+        use_primary()
+    key = f'{content_version()}:{request.get_full_path()}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def encode_cursor(date, pk):
+    """
+    Encode the position after the given entry as an opaque cursor.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    raw = f'{date.isoformat()}|{pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Returns:
+        tuple: (date, id) of the last entry on the previous page.
+
+    Raises:
+        ApiError: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        date, pk = raw.split('|')
+        date = parse_datetime(date)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError("Niepoprawny kursor")
+    if date is None:
+        raise ApiError("Niepoprawny kursor")
+    return date, pk
+
+
+def parse_fields(request):
+    """
+    Read the sparse fieldset from the ``fields`` query parameter.
+
+    Returns:
+        tuple: Requested field names in declaration order.
+
+    Raises:
+        ApiError: If an unknown field is requested.
+    """
+    value = request.GET.get('fields')
+    if not value:
+        return ALL_FIELDS
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - set(ALL_FIELDS)
+    if unknown:
+        raise ApiError(f"Nieznane pola: {', '.join(sorted(unknown))}")
+    return tuple(name for name in ALL_FIELDS if name in requested)
+
+
+def parse_limit(request):
+    """
+    Read the page size from the ``limit`` query parameter.
+
+    Raises:
+        ApiError: If the limit is not a positive integer.
+    """
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError("Niepoprawny limit")
+    if limit < 1:
+        raise ApiError("Niepoprawny limit")
+    return min(limit, MAX_LIMIT)
+
+
+def fetch_rows(queryset, fields):
+    """
+    Select only the requested columns and attach images with one query.
+
+    ``id`` and ``date`` are always selected since cursors and images need them.
+
+    Returns:
+        list: Row dictionaries.
+    """
+    columns = {'id', 'date'} | {name for name in fields if name in COLUMN_FIELDS}
+    rows = list(queryset.values(*columns))
+    if 'images' in fields and rows:
+        images = {row['id']: [] for row in rows}
+        storage = RealizationImage._meta.get_field('image').storage
+        image_rows = (RealizationImage.objects
+                      .filter(realization_id__in=images)
+                      .order_by('id')
+                      .values_list('realization_id', 'image'))
+        for realization_id, name in image_rows:
+            images[realization_id].append(storage.url(name))
+        for row in rows:
+            row['images'] = images[row['id']]
+    return rows
+
+
+def serialize_row(row, fields):
+    """
+    Convert a row into a JSON-ready dictionary with only the requested fields.
+
+    Returns:
+        dict: Serialized entry.
+    """
+    data = {}
+    for name in fields:
+        value = row[name]
+        if name == 'date':
+            value = value.isoformat()
+        elif name == 'image':
+            value = (Realization._meta.get_field('image').storage.url(value)
+                     if value else None)
+        data[name] = value
+    return data
+
+
+def dumps(data):
+    """Encode data as compact JSON."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def stream_page(rows, fields, next_url):
+    """
+    Yield a page of results as JSON chunks.
+
+    Args:
+        rows (list): Row dictionaries for the page.
+        fields (tuple): Requested field names.
+        next_url (str): URL of the next page or None.
+    """
+    yield f'{{"version":"{API_VERSION}","results":['
+    for start in range(0, len(rows), STREAM_BATCH):
+        chunk = ','.join(dumps(serialize_row(row, fields)) for row in rows[start:start + STREAM_BATCH])
+        yield chunk if start == 0 else ',' + chunk
+    yield f'],"next":{dumps(next_url)}}}'
+
+
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=realization_etag)
+def realization_list(request):
+    """
+    List realizations, newest first, with cursor pagination.
+
+    Query parameters:
+        cursor: Opaque position returned as ``next`` by the previous page.
+        limit: Page size (at most ``MAX_LIMIT``).
+        fields: Comma separated list of fields to return.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        StreamingHttpResponse: JSON page of realizations.
+    """
+    try:
+        fields = parse_fields(request)
+        limit = parse_limit(request)
+        queryset = Realization.objects.order_by('-date', '-id')
+        cursor = request.GET.get('cursor')
+        if cursor:
+            date, pk = decode_cursor(cursor)
+            queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+        rows = fetch_rows(queryset[:limit + 1], fields)
+    except ApiError as e:
+        logger.error(f"Błędne zapytanie do API: {e}")
+        return JsonResponse({'error': str(e)}, status=400)
+
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['cursor'] = encode_cursor(rows[-1]['date'], rows[-1]['id'])
+        next_url = request.build_absolute_uri(f"{reverse('mainapp:api_realization_list')}?{params.urlencode()}")
+
+    logger.debug(f"API: lista realizacji ({len(rows)})")
+    return StreamingHttpResponse(stream_page(rows, fields, next_url), content_type='application/json')
+
+
+@require_http_methods(["GET", "HEAD"])
+@condition(etag_func=realization_etag)
+def realization_detail(request, entry_id):
+    """
+    Return a single realization.
+
+    Args:
+        request (HttpRequest): The request object.
+        entry_id (int): The ID of the realization.
+
+    Returns:
+        JsonResponse: The serialized realization.
+    """
+    try:
+        fields = parse_fields(request)
+    except ApiError as e:
+        logger.error(f"Błędne zapytanie do API: {e}")
+        return JsonResponse({'error': str(e)}, status=400)
+
+    rows = fetch_rows(Realization.objects.filter(pk=entry_id), fields)
+    if not rows:
+        logger.error(f"API: realizacja o id {entry_id} nie istnieje")
+        return JsonResponse({'error': "Podany wpis nie istnieje"}, status=404)
+
+    data = serialize_row(rows[0], fields)
+    return JsonResponse({'version': API_VERSION, 'result': data}, json_dumps_params={'ensure_ascii': False})
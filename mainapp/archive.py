@@ -0,0 +1,129 @@
+import datetime
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Realization
+
+# Cache timeout for months that can still change (current and future months)
+OPEN_MONTH_TIMEOUT = 60 * 60
+
+
+def archive_cache_key(year, month):
+    """
+    Build the cache key for per-day counts of a given month.
+
+    Args:
+        year (int): The year.
+        month (int): The month (1-12).
+
+    Returns:
+        str: Cache key.
+    """
+    return f'realization_archive_{year}_{month:02d}'
+
+
+def month_bounds(year, month):
+    """
+    Return aware datetimes delimiting the month in the current timezone.
+
+    Args:
+        year (int): The year.
+        month (int): The month (1-12).
+
+    Returns:
+        tuple: (start, end) where end is the first moment of the next month.
+    """
+    start = timezone.make_aware(datetime.datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime.datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime.datetime(year, month + 1, 1))
+    return start, end
+
+
+def day_bounds(day):
+    """
+    Return aware datetimes delimiting the day in the current timezone.
+
+    Filtering on these bounds uses the index on ``date``, unlike ``date__date``.
+
+    Args:
+        day (date): The day.
+
+    Returns:
+        tuple: (start, end) where end is the first moment of the next day.
+    """
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    end = timezone.make_aware(datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min))
+    return start, end
+
+
+def is_closed_month(year, month):
+    """
+    Check whether the month is already over.
+
+    Returns:
+        bool: True for months before the current one.
+    """
+    today = timezone.localdate()
+    return (year, month) < (today.year, today.month)
+
+
+def compute_day_counts(year, month):
+    """
+    Count realizations per day of the month with a single grouped query.
+
+    The range filter on ``date`` is served by the index on that column. The
+    counts are cached without expiry, so they are read from the primary: a
+    lagging replica would keep a stale month in the cache until the next change.
+
+    Returns:
+        dict: Mapping of day number to number of realizations.
+    """
+    start, end = month_bounds(year, month)
+    rows = (Realization.objects.using('default')
+            .filter(date__gte=start, date__lt=end)
+            .annotate(day=TruncDate('date'))
+            .values('day')
+            .annotate(count=Count('id'))
+            .order_by())
+    return {row['day'].day: row['count'] for row in rows}
+
+
+def get_day_counts(year, month):
+    """
+    Return cached per-day counts for the month.
+
+    Closed months are cached without expiry, open months for
+    ``OPEN_MONTH_TIMEOUT`` seconds; both are invalidated when a realization
+    in that month changes.
+
+    Returns:
+        dict: Mapping of day number to number of realizations.
+    """
+    key = archive_cache_key(year, month)
+    counts = cache.get(key)
+    if counts is None:
+        counts = compute_day_counts(year, month)
+        timeout = None if is_closed_month(year, month) else OPEN_MONTH_TIMEOUT
+        cache.set(key, counts, timeout)
+    return counts
+
+
+def invalidate_month(date):
+    """
+    Drop cached counts for the month containing the given datetime.
+
+    Args:
+        date (datetime): Date of a changed realization; strings and dates
+            accepted by the model field are normalized first.
+    """
+    if date is None:
+        return
+    date = Realization._meta.get_field('date').to_python(date)
+    if timezone.is_aware(date):
+        date = timezone.localtime(date)
+    cache.delete(archive_cache_key(date.year, date.month))
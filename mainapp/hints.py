@@ -0,0 +1,110 @@
+from collections import OrderedDict
+
+from django_bootstrap5.core import css_url, javascript_url
+
+
+def critical_assets():
+    """
+    Return the render-blocking Bootstrap 5 CSS and JS from the ``<head>`` of base.html.
+
+    The legacy Bootstrap 4 stylesheet linked next to them is left to the
+    browser's own discovery, so two frameworks do not compete with the first
+    image for bandwidth.
+
+    Returns:
+        list: Dictionaries with ``url``, ``as`` and optionally ``integrity`` and ``crossorigin``.
+    """
+    return [
+        {**css_url(), 'as': 'style'},
+        {**javascript_url(), 'as': 'script'},
+    ]
+
+
+def preload_links(image_url=None):
+    """
+    Build ``Link: rel=preload`` values for the critical assets of a page.
+
+    Args:
+        image_url (str, optional): URL of the first image shown on the page.
+
+    Returns:
+        list: Link header values.
+    """
+    links = []
+    for asset in critical_assets():
+        link = f"<{asset['url']}>; rel=preload; as={asset['as']}"
+        # Both must match the attributes on the tag, otherwise the browser fetches twice
+        if asset.get('integrity'):
+            link += f'; integrity="{asset["integrity"]}"'
+        if asset.get('crossorigin'):
+            link += f"; crossorigin={asset['crossorigin']}"
+        links.append(link)
+    if image_url:
+        links.append(f'<{image_url}>; rel=preload; as=image; fetchpriority=high')
+    return links
+
+
+def add_preload_header(response, image_url=None):
+    """
+    Set the ``Link`` preload header on a rendered page.
+
+    Args:
+        response (HttpResponse): The response to update.
+        image_url (str, optional): URL of the first image shown on the page.
+
+    Returns:
+        HttpResponse: The same response.
+    """
+    response['Link'] = ', '.join(preload_links(image_url))
+    return response
+
+
+class EarlyHintsMiddleware:
+    """
+    ASGI middleware sending 103 Early Hints before the view runs.
+
+    The ``Link`` header of the last successful response for a URL is
+    remembered and replayed as an early hint on the next request for it, so
+    browsers start fetching CSS, JS and the first image while the page is
+    still being rendered. Only servers advertising the
+    ``http.response.early_hint`` extension receive hints.
+
+    Attributes:
+        app: The wrapped ASGI application.
+        max_entries (int): Number of URLs whose hints are remembered.
+    """
+    def __init__(self, app, max_entries=1024):
+        self.app = app
+        self.max_entries = max_entries
+        self.hints = OrderedDict()
+
+    async def __call__(self, scope, receive, send):
+        if (scope['type'] != 'http' or scope['method'] not in ('GET', 'HEAD')
+                or 'http.response.early_hint' not in scope.get('extensions', {})):
+            return await self.app(scope, receive, send)
+
+        key = (scope['path'], scope.get('query_string', b''))
+        links = self.hints.get(key)
+        if links:
+            self.hints.move_to_end(key)
+            await send({'type': 'http.response.early_hint', 'links': links})
+
+        async def remember_links(message):
+            if message['type'] == 'http.response.start':
+                self.learn(key, message)
+            await send(message)
+
+        return await self.app(scope, receive, remember_links)
+
+    def learn(self, key, message):
+        """
+        Store or forget the Link header of a response start message.
+        """
+        links = [value for name, value in message.get('headers', []) if name.lower() == b'link']
+        if message['status'] == 200 and links:
+            self.hints[key] = links
+            self.hints.move_to_end(key)
+            while len(self.hints) > self.max_entries:
+                self.hints.popitem(last=False)
+        else:
+            self.hints.pop(key, None)
@@ -0,0 +1,198 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import zopfli.png
+from django.conf import settings
+from django.core.files import File
+from PIL import ExifTags, Image, ImageOps, JpegImagePlugin
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+# PNG chunks kept by zopfli; everything else (text, eXIf, time) is dropped
+PNG_KEEP_CHUNKS = ['iCCP', 'sRGB', 'gAMA']
+
+# Zopfli effort; even so it takes seconds per screenshot, so it only runs from the
+# optimize_images command, never during a request
+ZOPFLI_OPTIONS = {'filter_strategies': 'e', 'num_iterations': 3, 'num_iterations_large': 1}
+
+
+def optimize_image(file, recompress=False):
+    """
+    Prepare an uploaded photo for storage.
+
+    Applies the EXIF orientation, strips metadata, caps the dimensions at
+    ``IMAGE_MAX_DIMENSION``, re-encodes JPEGs as progressive and saves PNGs
+    with Pillow's optimizer. Multi-picture JPEGs from phone cameras (MPO) are
+    stored as plain JPEGs of their first frame. Other formats are left untouched.
+
+    The result is written to a spooled temporary file, so large images do not
+    stay in memory.
+
+    Args:
+        file (File): The uploaded image file.
+        recompress (bool): Also recompress PNGs losslessly with zopfli; too
+            slow for requests.
+
+    Returns:
+        File: Optimized file with the original name, or None if it could not be processed.
+    """
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        image_format = 'JPEG' if image.format == 'MPO' else image.format
+        if image_format not in ('JPEG', 'PNG'):
+            return None
+
+        max_size = (settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION)
+        oversized = image.width > max_size[0] or image.height > max_size[1]
+        if oversized and image_format == 'JPEG':
+            # Let the decoder downscale by a power of two before resizing
+            image.draft(image.mode, max_size)
+
+        rotated = image.getexif().get(ExifTags.Base.Orientation, 1) != 1
+        changed = oversized or rotated
+        if rotated:
+            image = ImageOps.exif_transpose(image)
+        if oversized:
+            image.thumbnail(max_size, Image.LANCZOS)
+
+        output = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+        icc_profile = image.info.get('icc_profile')
+        if image_format == 'JPEG':
+            # Only the current (first) frame is saved; the other MPO frames hold depth maps and previews.
+            # Keep the original quantization when pixels are unchanged to avoid generation loss
+            if changed:
+                quality = {'quality': settings.IMAGE_JPEG_QUALITY}
+            else:
+                # Like quality='keep', which Pillow refuses for MPO files
+                quality = {'qtables': image.quantization, 'subsampling': JpegImagePlugin.get_sampling(image)}
+            image.save(output, 'JPEG', progressive=True, optimize=True, icc_profile=icc_profile, **quality)
+        else:
+            image.save(output, 'PNG', optimize=True, icc_profile=icc_profile)
+            if recompress:
+                output.seek(0)
+                data = zopfli.png.optimize(output.read(), keepchunks=PNG_KEEP_CHUNKS, **ZOPFLI_OPTIONS)
+                output.seek(0)
+                output.truncate()
+                output.write(data)
+        output.seek(0)
+    except (OSError, ValueError, SyntaxError) as e:
+        logger.error(f"Nie udało się zoptymalizować zdjęcia {file.name}: {e}")
+        return None
+
+    logger.debug(f"Zoptymalizowano zdjęcie {file.name}")
+    return File(output, name=os.path.basename(file.name))
+
+
+def optimize_field_file(field_file):
+    """
+    Replace the content of a newly assigned image field with its optimized version.
+
+    Files already committed to storage are left untouched.
+
+    Args:
+        field_file (FieldFile): Value of an ImageField before saving.
+    """
+    if not field_file or field_file._committed:
+        return
+    optimized = optimize_image(field_file.file)
+    if optimized is not None:
+        field_file.file = optimized
+
+
+def thumbnail_path(path, max_size):
+    """
+    Return the cache location of a thumbnail of the image at ``path``.
+
+    The name depends on the source path, its modification time and the size,
+    so a replaced original gets a new thumbnail.
+
+    Args:
+        path (str): Path of the original image.
+        max_size (int): Longest side of the thumbnail in pixels.
+
+    Returns:
+        str: Path inside ``THUMBNAIL_CACHE_DIR``.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    key = hashlib.sha1(f'{path}:{mtime}:{max_size}'.encode()).hexdigest()
+    return os.path.join(settings.THUMBNAIL_CACHE_DIR, key[:2], f'{key}.jpg')
+
+
+def build_thumbnail(source, destination, max_size, quality):
+    """
+    Decode an image and write a downscaled baseline JPEG.
+
+    Runs in worker processes, so it only takes plain arguments.
+
+    Returns:
+        str: The destination path, or None if the source could not be decoded.
+    """
+    try:
+        with Image.open(source) as image:
+            image.draft('RGB', (max_size, max_size))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            # Write under a temporary name so readers never see a partial file
+            partial = f'{destination}.{os.getpid()}.tmp'
+            image.save(partial, 'JPEG', quality=quality, optimize=True)
+            os.replace(partial, destination)
+    except (OSError, ValueError, SyntaxError):
+        return None
+    return destination
+
+
+def get_thumbnails(paths, max_size):
+    """
+    Return cached thumbnails for many images, building missing ones in parallel.
+
+    Missing thumbnails are decoded in up to ``THUMBNAIL_WORKERS`` worker processes.
+    They are spawned rather than forked: forking a threaded server process can
+    copy a lock held by another thread and deadlock the worker.
+
+    Args:
+        paths (iterable): Paths of original images.
+        max_size (int): Longest side of the thumbnails in pixels.
+
+    Returns:
+        dict: Original path -> thumbnail path, for images that could be read.
+    """
+    thumbnails, missing = {}, {}
+    for path in set(paths):
+        try:
+            destination = thumbnail_path(path, max_size)
+        except OSError:
+            logger.error(f"Brak pliku zdjęcia {path}")
+            continue
+        if os.path.exists(destination):
+            thumbnails[path] = destination
+        else:
+            missing[path] = destination
+
+    cached = len(thumbnails)
+    quality = settings.THUMBNAIL_JPEG_QUALITY
+    if len(missing) > 1 and settings.THUMBNAIL_WORKERS > 1:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, mp_context=context) as executor:
+            results = executor.map(build_thumbnail, missing, missing.values(),
+                                   [max_size] * len(missing), [quality] * len(missing))
+            built = dict(zip(missing, results))
+    else:
+        built = {path: build_thumbnail(path, destination, max_size, quality)
+                 for path, destination in missing.items()}
+
+    for path, destination in built.items():
+        if destination is None:
+            logger.error(f"Nie udało się utworzyć miniatury {path}")
+        else:
+            thumbnails[path] = destination
+    logger.debug(f"Miniatury: {cached} z pamięci podręcznej, {len(missing)} nowych")
+    return thumbnails
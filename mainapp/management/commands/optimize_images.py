@@ -0,0 +1,60 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mainapp.images import optimize_image
+from mainapp.models import Realization, RealizationImage
+
+
+class Command(BaseCommand):
+    """
+    Optimize stored photos, including those from before upload-time optimization existed.
+
+    PNGs are also recompressed with zopfli, which is too slow to run during uploads.
+    Each stored file is processed once and overwritten in place under the same name,
+    even when it does not get smaller, so that metadata is always stripped.
+    """
+    help = "Optimize stored realization photos (orientation, metadata, size, compression)"
+
+    def handle(self, *args, **options):
+        names = set()
+        for model in (Realization, RealizationImage):
+            names.update(model.objects.exclude(image='').exclude(image__isnull=True)
+                         .values_list('image', flat=True))
+
+        storage = RealizationImage._meta.get_field('image').storage
+        saved = 0
+        for name in sorted(names):
+            if not storage.exists(name):
+                self.stderr.write(f"Brak pliku: {name}")
+                continue
+            size = storage.size(name)
+            with storage.open(name) as original:
+                optimized = optimize_image(original, recompress=True)
+            if optimized is None:
+                continue
+            self.replace(storage, name, optimized)
+            saved += size - optimized.size
+            self.stdout.write(f"{name}: {size} -> {optimized.size}")
+
+        self.stdout.write(self.style.SUCCESS(f"Zaoszczędzono {saved} bajtów"))
+
+    def replace(self, storage, name, optimized):
+        """
+        Overwrite a stored file without ever deleting the original first.
+
+        The optimized file is saved under a temporary name and atomically moved
+        over the original, so an interrupted run leaves the original intact.
+        """
+        temporary = f'{name}.optimized'
+        if storage.exists(temporary):
+            # Left over from an interrupted run
+            storage.delete(temporary)
+        saved_name = storage.save(temporary, optimized)
+        try:
+            if saved_name != temporary:
+                raise CommandError(f"Plik tymczasowy zapisano jako {saved_name} zamiast {temporary}")
+            os.replace(storage.path(saved_name), storage.path(name))
+        except (NotImplementedError, OSError, CommandError):
+            storage.delete(saved_name)
+            raise
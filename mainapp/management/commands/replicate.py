@@ -0,0 +1,48 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Copy the SQLite primary database to the SQLite replicas.
+
+    Stand-in for real replication when testing the read/write router locally.
+    With ``--interval`` it keeps running and copies the database periodically;
+    the interval should stay below ``REPLICA_STICKY_SECONDS``.
+    """
+    help = "Copy the primary SQLite database to the replicas listed in DATABASE_REPLICAS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help="Seconds between copies; copy once when omitted")
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("Brak replik w DATABASE_REPLICAS")
+        databases = [settings.DATABASES['default']] + [settings.DATABASES[alias] for alias in settings.DATABASE_REPLICAS]
+        if any(db['ENGINE'] != 'django.db.backends.sqlite3' for db in databases):
+            raise CommandError("Polecenie obsługuje tylko bazy SQLite; użyj replikacji serwera bazy danych")
+
+        while True:
+            self.replicate()
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def replicate(self):
+        """Copy the primary to every replica with the SQLite online backup API."""
+        primary = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        try:
+            for alias in settings.DATABASE_REPLICAS:
+                replica = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    # A single step, so readers of the replica never see a partial copy
+                    primary.backup(replica)
+                finally:
+                    replica.close()
+                self.stdout.write(f"Skopiowano bazę do repliki {alias}")
+        finally:
+            primary.close()
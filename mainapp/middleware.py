@@ -0,0 +1,138 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.sessions import middleware as sessions_middleware
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+
+from .routers import RoutingState, routing_state
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+# Cookie keeping a client on the primary database right after it wrote
+PRIMARY_STICKY_COOKIE = 'primary_sticky'
+
+
+def view_name(request):
+    """
+    Resolve the name of the view handling the request, cached on the request.
+
+    Returns:
+        str: Namespaced view name or None if the path does not resolve.
+    """
+    if not hasattr(request, '_view_name'):
+        try:
+            request._view_name = resolve(request.path_info).view_name
+        except Resolver404:
+            request._view_name = None
+    return request._view_name
+
+
+def is_sessionless(request):
+    """
+    Check whether the request can skip session, auth and message processing.
+
+    That is the case for GET and HEAD requests to views listed in
+    ``SESSIONLESS_VIEWS`` from visitors without a session or messages cookie:
+    they are anonymous and there is nothing stored for them.
+
+    The result is cached on the request.
+
+    Args:
+        request (HttpRequest): The request object.
+
+    Returns:
+        bool: True if the fast path applies.
+    """
+    if not hasattr(request, '_sessionless'):
+        request._sessionless = False
+        if (request.method in ('GET', 'HEAD')
+                and settings.SESSION_COOKIE_NAME not in request.COOKIES
+                and CookieStorage.cookie_name not in request.COOKIES):
+            request._sessionless = view_name(request) in settings.SESSIONLESS_VIEWS
+    return request._sessionless
+
+
+class SessionMiddleware(sessions_middleware.SessionMiddleware):
+    """Session middleware giving sessionless requests an empty session that is never saved."""
+
+    def process_request(self, request):
+        if is_sessionless(request):
+            request.session = self.SessionStore()
+            return
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        if is_sessionless(request):
+            # The response depends on the absence of session and messages cookies,
+            # so caches must not serve it to visitors who have them
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return super().process_response(request, response)
+
+
+class AuthenticationMiddleware(auth_middleware.AuthenticationMiddleware):
+    """Authentication middleware treating sessionless requests as anonymous."""
+
+    def process_request(self, request):
+        if is_sessionless(request):
+            request.user = AnonymousUser()
+            return
+        super().process_request(request)
+
+
+class MessageMiddleware(messages_middleware.MessageMiddleware):
+    """Message middleware without message storage for sessionless requests."""
+
+    def process_request(self, request):
+        if is_sessionless(request):
+            # get_messages() returns an empty list when no storage is attached
+            return
+        super().process_request(request)
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Decide per request whether reads may go to a replica.
+
+    Reads of the views in ``REPLICA_READ_VIEWS`` go to replicas. After a
+    request that wrote to the primary, the client gets a cookie that keeps its
+    reads on the primary for ``REPLICA_STICKY_SECONDS``, longer than the
+    replication lag, so it always sees its own changes.
+
+    If a replica fails while serving a read-only request, the request is
+    repeated once on the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        use_replica = (bool(settings.DATABASE_REPLICAS)
+                       and request.method in ('GET', 'HEAD')
+                       and PRIMARY_STICKY_COOKIE not in request.COOKIES
+                       and view_name(request) in settings.REPLICA_READ_VIEWS)
+        state = RoutingState(use_replica)
+        response = self.handle(request, state)
+        if state.failed:
+            logger.warning(f"Powtarzanie {request.path} na bazie głównej po awarii repliki {state.alias}")
+            state = RoutingState(False)
+            response = self.handle(request, state)
+
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(PRIMARY_STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def handle(self, request, state):
+        """Process the request with the given routing state."""
+        token = routing_state.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            routing_state.reset(token)
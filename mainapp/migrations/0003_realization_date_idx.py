@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 14:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0002_delete_appointment_delete_comment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='realization',
+            index=models.Index(fields=['date'], name='realization_date_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-19 14:15
+
+from django.db import migrations, models
+
+from mainapp.text import content_to_html, make_excerpt
+
+
+def render_existing(apps, schema_editor):
+    # Historical models don't run Realization.save(), so render here
+    Realization = apps.get_model('mainapp', 'Realization')
+    db_alias = schema_editor.connection.alias
+    realizations = list(Realization.objects.using(db_alias).only('id', 'content'))
+    for realization in realizations:
+        realization.content_html = content_to_html(realization.content)
+        realization.excerpt = make_excerpt(realization.content)
+    Realization.objects.using(db_alias).bulk_update(realizations, ['content_html', 'excerpt'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0003_realization_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='realization',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='realization',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=301),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
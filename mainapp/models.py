@@ -4,6 +4,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .text import EXCERPT_LENGTH, content_to_html, make_excerpt
+
 
 class Realization(models.Model):
     """
@@ -13,12 +15,16 @@ class Realization(models.Model):
         title (str): The title of the realization.
         content (str): The description of the realization.
         date (datetime): The date and time when the realization was added.
+        content_html (str): Content rendered to HTML, updated on save.
+        excerpt (str): Shortened content for listings, updated on save.
     """
     title = models.CharField(max_length=100, verbose_name="Tytuł")  # Title of the realization
     content = models.CharField(max_length=1000, verbose_name="Opis")  # Description of the realization
     date = models.DateTimeField(default=timezone.now,
                                 verbose_name="Data dodania")  # Date and time when the realization was added
     image = models.ImageField(upload_to='realizations_images/', null=True, blank=True, verbose_name="Zdjęcie główne") # Image of the realization
+    content_html = models.TextField(blank=True, editable=False)  # Rendered content, so views don't run linebreaks
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH + 1, blank=True, editable=False)  # Content shortened for the blog listing
 
     def __str__(self):
         """
@@ -29,9 +35,23 @@ class Realization(models.Model):
         """
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Render the content to HTML and an excerpt before saving.
+        """
+        self.content_html = content_to_html(self.content)
+        self.excerpt = make_excerpt(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'content_html', 'excerpt'}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name_plural = "Realizacje"  # Plural name for the Realization model
         ordering = ['-date']  # Default ordering by date
+        indexes = [
+            models.Index(fields=['date'], name='realization_date_idx'),  # Archive and listing lookups by date
+        ]
 
 
 class RealizationImage(models.Model):
@@ -0,0 +1,135 @@
+import contextvars
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, InterfaceError, OperationalError, connections
+from django.utils.connection import ConnectionDoesNotExist
+
+# Get an instance of a logger
+logger = logging.getLogger(__name__)
+
+# Routing state of the current request, set by DatabaseRoutingMiddleware.
+# Outside of requests (shell, management commands) everything uses the primary.
+routing_state = contextvars.ContextVar('routing_state', default=None)
+
+# alias -> (healthy, time of the check)
+_health = {}
+
+
+class RoutingState:
+    """
+    Database routing decisions for one request.
+
+    Attributes:
+        use_replica (bool): Whether reads may go to a replica.
+        alias (str): Replica chosen for this request, so all its reads see one snapshot.
+        wrote (bool): Whether the request wrote to the primary.
+        failed (bool): Whether a query on the replica failed, so the request should be repeated on the primary.
+    """
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.alias = None
+        self.wrote = False
+        self.failed = False
+
+
+def use_primary():
+    """Send the remaining reads of the current request to the primary."""
+    state = routing_state.get()
+    if state is not None:
+        state.use_replica = False
+
+
+def mark_unhealthy(alias, error):
+    """Skip a replica until the next health check after it failed."""
+    logger.error(f"Replika {alias} jest niedostępna: {error}")
+    _health[alias] = (False, time.monotonic())
+
+
+def replica_query_guard(execute, sql, params, many, context):
+    """
+    Execute wrapper for replica connections reporting failed queries.
+
+    A replica can fail between health checks; the failure marks it unhealthy
+    and flags the request, so ``DatabaseRoutingMiddleware`` repeats it on the
+    primary instead of returning an error.
+    """
+    try:
+        return execute(sql, params, many, context)
+    except (OperationalError, InterfaceError) as e:
+        mark_unhealthy(context['connection'].alias, e)
+        state = routing_state.get()
+        if state is not None:
+            state.failed = True
+        raise
+
+
+def replica_is_healthy(alias):
+    """
+    Check whether a replica accepts queries and has the schema replicated.
+
+    Results are cached for ``REPLICA_HEALTH_CHECK_INTERVAL`` seconds, so an
+    unhealthy replica is skipped until the next check.
+
+    Args:
+        alias (str): Database alias of the replica.
+
+    Returns:
+        bool: True if the replica can serve reads.
+    """
+    now = time.monotonic()
+    healthy, checked_at = _health.get(alias, (None, 0))
+    if healthy is not None and now - checked_at < settings.REPLICA_HEALTH_CHECK_INTERVAL:
+        return healthy
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute('SELECT 1 FROM django_migrations LIMIT 1')
+    except (ConnectionDoesNotExist, DatabaseError) as e:
+        mark_unhealthy(alias, e)
+        return False
+    _health[alias] = (True, now)
+    return True
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary (``default``) and reads of public pages to replicas.
+
+    Reads go to a replica only when the current request allows it (see
+    ``REPLICA_READ_VIEWS``); a random healthy replica from
+    ``DATABASE_REPLICAS`` is picked once per request, falling back to the
+    primary when none is healthy or the chosen one cannot be connected to.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if state is None or not state.use_replica or state.wrote or state.failed:
+            return 'default'
+        if state.alias is None:
+            replicas = [alias for alias in settings.DATABASE_REPLICAS if replica_is_healthy(alias)]
+            state.alias = random.choice(replicas) if replicas else 'default'
+            if state.alias != 'default':
+                try:
+                    connections[state.alias].ensure_connection()
+                except (ConnectionDoesNotExist, DatabaseError) as e:
+                    mark_unhealthy(state.alias, e)
+                    state.alias = 'default'
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
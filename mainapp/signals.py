@@ -0,0 +1,57 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .api import bump_content_version
+from .archive import invalidate_month
+from .images import optimize_field_file
+from .models import Realization, RealizationImage
+from .routers import replica_query_guard
+
+
+@receiver(pre_save, sender=Realization)
+def remember_previous_date(sender, instance, **kwargs):
+    """Store the date from the database so a moved realization clears its old month."""
+    instance._previous_date = None
+    if instance.pk:
+        instance._previous_date = (Realization.objects
+                                   .filter(pk=instance.pk)
+                                   .values_list('date', flat=True)
+                                   .first())
+
+
+@receiver(pre_save, sender=Realization)
+@receiver(pre_save, sender=RealizationImage)
+def optimize_uploaded_images(sender, instance, **kwargs):
+    """Optimize newly uploaded photos before they are written to storage."""
+    optimize_field_file(instance.image)
+
+
+@receiver(post_save, sender=Realization)
+def invalidate_archive_on_save(sender, instance, **kwargs):
+    """Clear cached archive counts for the months touched by the save."""
+    invalidate_month(getattr(instance, '_previous_date', None))
+    invalidate_month(instance.date)
+
+
+@receiver(post_delete, sender=Realization)
+def invalidate_archive_on_delete(sender, instance, **kwargs):
+    """Clear cached archive counts for the month of the deleted realization."""
+    invalidate_month(instance.date)
+
+
+@receiver(post_save, sender=Realization)
+@receiver(post_delete, sender=Realization)
+@receiver(post_save, sender=RealizationImage)
+@receiver(post_delete, sender=RealizationImage)
+def invalidate_api_etags(sender, **kwargs):
+    """Change the API content version so clients refetch modified data."""
+    bump_content_version()
+
+
+@receiver(connection_created)
+def guard_replica_queries(sender, connection, **kwargs):
+    """Report failed queries on replica connections to the router."""
+    if connection.alias in settings.DATABASE_REPLICAS and replica_query_guard not in connection.execute_wrappers:
+        connection.execute_wrappers.append(replica_query_guard)
@@ -0,0 +1,150 @@
+/*
+ * Resumable chunked photo upload for the Realization change form.
+ *
+ * Each file is sent in consecutive chunks (POST with Content-Range) to the
+ * admin upload endpoint; several files are uploaded in parallel. The upload
+ * id is derived from the file itself, so after a dropped connection (or a
+ * page reload and selecting the same files again) the upload asks the server
+ * for its offset and continues from there.
+ */
+(function () {
+    'use strict';
+
+    const MAX_RETRIES = 8;
+
+    class FatalError extends Error {}
+
+    function csrfToken() {
+        const input = document.querySelector('input[name=csrfmiddlewaretoken]');
+        return input ? input.value : '';
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    function uploadId(file) {
+        const name = file.name.replace(/[^A-Za-z0-9_-]/g, '_');
+        return `${file.size}-${file.lastModified}-${name}`.slice(0, 64);
+    }
+
+    async function parseResponse(response) {
+        let data = {};
+        try {
+            data = await response.json();
+        } catch (e) {
+            // Non-JSON error page
+        }
+        if (response.ok || response.status === 409) {
+            return data;
+        }
+        if (response.status >= 500) {
+            throw new Error(data.error || response.statusText);
+        }
+        throw new FatalError(data.error || response.statusText);
+    }
+
+    async function fetchStatus(url) {
+        const response = await fetch(url, {credentials: 'same-origin'});
+        return parseResponse(response);
+    }
+
+    async function sendChunk(url, file, start, chunkSize) {
+        const end = Math.min(start + chunkSize, file.size);
+        const response = await fetch(url, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': 'application/octet-stream',
+                'Content-Range': `bytes ${start}-${end - 1}/${file.size}`,
+                'X-File-Name': encodeURIComponent(file.name),
+                'X-CSRFToken': csrfToken(),
+            },
+            body: file.slice(start, end),
+        });
+        return parseResponse(response);
+    }
+
+    async function uploadFile(file, baseUrl, chunkSize, report) {
+        const url = baseUrl.replace('UPLOAD_ID', uploadId(file));
+        let retries = 0;
+        let offset = null;
+        while (true) {
+            try {
+                if (offset === null) {
+                    const status = await fetchStatus(url);
+                    if (status.complete) {
+                        // Attached already; only the response to the last chunk was lost
+                        report('gotowe');
+                        return;
+                    }
+                    offset = status.offset;
+                }
+                const data = await sendChunk(url, file, offset, chunkSize);
+                if (data.complete) {
+                    report('gotowe');
+                    return;
+                }
+                offset = data.offset;
+                retries = 0;
+                report(`${Math.floor(100 * offset / file.size)}%`);
+            } catch (e) {
+                if (e instanceof FatalError || ++retries > MAX_RETRIES) {
+                    report(`błąd: ${e.message}`);
+                    return;
+                }
+                report(`ponawianie (${retries}/${MAX_RETRIES})...`);
+                await sleep(Math.min(1000 * 2 ** retries, 30000));
+                // Ask the server how much arrived before the connection dropped
+                offset = null;
+            }
+        }
+    }
+
+    function start(zone, files) {
+        const list = document.getElementById('chunked-upload-list');
+        const queue = Array.from(files).map(file => {
+            const item = document.createElement('li');
+            list.appendChild(item);
+            const report = status => { item.textContent = `${file.name}: ${status}`; };
+            report('oczekuje');
+            return {file, report};
+        });
+        const chunkSize = parseInt(zone.dataset.chunkSize, 10);
+        const worker = async () => {
+            let task;
+            while ((task = queue.shift())) {
+                if (task.file.size === 0) {
+                    task.report('błąd: pusty plik');
+                    continue;
+                }
+                await uploadFile(task.file, zone.dataset.url, chunkSize, task.report);
+            }
+        };
+        for (let i = 0; i < parseInt(zone.dataset.parallel, 10); i++) {
+            worker();
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', () => {
+        const zone = document.getElementById('chunked-upload');
+        if (!zone) {
+            return;
+        }
+        const input = zone.querySelector('input[type=file]');
+        input.addEventListener('change', () => {
+            start(zone, input.files);
+            input.value = '';
+        });
+        zone.addEventListener('dragover', event => {
+            event.preventDefault();
+            zone.classList.add('dragover');
+        });
+        zone.addEventListener('dragleave', () => zone.classList.remove('dragover'));
+        zone.addEventListener('drop', event => {
+            event.preventDefault();
+            zone.classList.remove('dragover');
+            start(zone, event.dataTransfer.files);
+        });
+    });
+})();
@@ -1,17 +1,47 @@
+import asyncio
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core import mail
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.urls import reverse
 from django.core.paginator import Page
+from django.db import OperationalError
+from django.http import HttpResponse
 from django.contrib.admin.sites import AdminSite
+from django.utils import timezone
+from django_bootstrap5.core import css_url
+from PIL import Image, PngImagePlugin
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase import pdfmetrics
 
 from .forms import ContactForm
-from .models import Realization
-from .admin import RealizationAdmin
+from .models import Realization, RealizationImage
+from .admin import CATALOGUE_MARGIN, RealizationAdmin
+from .api import bump_content_version, realization_etag
+from .archive import archive_cache_key, compute_day_counts, get_day_counts
+from .hints import EarlyHintsMiddleware
+from .middleware import PRIMARY_STICKY_COOKIE, DatabaseRoutingMiddleware, is_sessionless
+from .routers import PrimaryReplicaRouter, RoutingState, _health, replica_query_guard, routing_state
+from .uploads import ChunkedUpload
 from .views import CalendarView
 
+# Tests must not clear or fill the shared on-disk cache of a running site
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
 
 # Model tests
+@override_settings(CACHES=TEST_CACHES)
 class TestModels(TestCase):
     def test_realization_str_representation(self):
         """Test string representation of Realization model"""
@@ -19,7 +49,21 @@ class TestModels(TestCase):
         self.assertEqual(str(realization), "Test")
 
 
+    def test_realization_renders_content_on_save(self):
+        """Test that HTML content and excerpt are stored on save"""
+        realization = Realization.objects.create(title="Test", content="<b>Dach</b>\n\nNowy")
+        self.assertEqual(realization.content_html, "<p>&lt;b&gt;Dach&lt;/b&gt;</p>\n\n<p>Nowy</p>")
+        self.assertEqual(realization.excerpt, "<b>Dach</b> Nowy")
+
+    def test_excerpt_cut_at_word_boundary(self):
+        """Test that long content is shortened between words"""
+        realization = Realization.objects.create(title="Test", content="słowo " * 100)
+        self.assertLessEqual(len(realization.excerpt), 301)
+        self.assertTrue(realization.excerpt.endswith("słowo…"))
+
+
 # Forms tests
+@override_settings(CACHES=TEST_CACHES)
 class TestForms(TestCase):
     def test_contact_form_valid(self):
         form = ContactForm(
@@ -28,6 +72,7 @@ class TestForms(TestCase):
 
 
 # Views tests
+@override_settings(CACHES=TEST_CACHES)
 class TestViews(TestCase):
     def setUp(self):
         """Setup before tests"""
@@ -89,6 +134,7 @@ class TestViews(TestCase):
 
 
 # Email sending tests
+@override_settings(CACHES=TEST_CACHES)
 class TestEmail(TestCase):
     def setUp(self):
         """Setup before tests"""
@@ -114,6 +160,7 @@ class TestEmail(TestCase):
 
 
 # Pagination tests
+@override_settings(CACHES=TEST_CACHES)
 class TestPagination(TestCase):
     """Tests for pagination"""
 
@@ -137,6 +184,13 @@ class TestPagination(TestCase):
         self.assertTrue('page_obj' in response.context)
         self.assertEqual(len(response.context['page_obj']), 10)
 
+    def test_listing_defers_content(self):
+        """Test that the listing does not fetch the full content"""
+        response = self.client.get(reverse('mainapp:blog'))
+        entry = response.context['page_obj'][0]
+        self.assertIn('content', entry.get_deferred_fields())
+        self.assertContains(response, entry.excerpt)
+
     def test_pagination_second_page(self):
         """Test if the second pagination page contains five items"""
         response = self.client.get(reverse('mainapp:blog') + '?page=2')
@@ -145,11 +199,542 @@ class TestPagination(TestCase):
         self.assertEqual(len(response.context['page_obj']), 5)
 
 
+# Archive calendar tests
+@override_settings(CACHES=TEST_CACHES)
+class TestArchive(TestCase):
+    """Tests for the month archive calendar"""
+
+    def setUp(self):
+        """Setup before tests"""
+        cache.clear()
+        for day in (3, 3, 17):
+            Realization.objects.create(title=f'Test {day}', content='Test Content',
+                                       date=timezone.make_aware(datetime.datetime(2024, 6, day, 12)))
+        Realization.objects.create(title='Other month', content='Test Content',
+                                   date=timezone.make_aware(datetime.datetime(2024, 7, 1, 12)))
+
+    def test_day_counts_single_query(self):
+        """Test that per-day counts are computed with one query and then cached"""
+        with self.assertNumQueries(1):
+            counts = get_day_counts(2024, 6)
+        self.assertEqual(counts, {3: 2, 17: 1})
+        with self.assertNumQueries(0):
+            get_day_counts(2024, 6)
+
+    def test_cache_invalidated_on_save(self):
+        """Test that saving a realization clears its month from the cache"""
+        get_day_counts(2024, 6)
+        Realization.objects.create(title='New', content='Test Content',
+                                   date=timezone.make_aware(datetime.datetime(2024, 6, 20, 12)))
+        self.assertIsNone(cache.get(archive_cache_key(2024, 6)))
+        self.assertEqual(get_day_counts(2024, 6)[20], 1)
+
+    def test_cache_invalidated_for_string_date(self):
+        """Test that a date given as a string is normalized before clearing its month"""
+        get_day_counts(2024, 6)
+        Realization.objects.create(title='New', content='Test Content', date='2024-06-10 12:00')
+        self.assertIsNone(cache.get(archive_cache_key(2024, 6)))
+
+    def test_calendar_links_days(self):
+        """Test that only days with realizations are linked"""
+        html = CalendarView(2024, 6, {3: 2}).formatmonth()
+        self.assertIn(reverse('mainapp:blog_day', args=[2024, 6, 3]), html)
+        self.assertNotIn(reverse('mainapp:blog_day', args=[2024, 6, 4]), html)
+
+    def test_calendar_localized(self):
+        """Test that month and weekday names are shown in Polish"""
+        html = CalendarView(2024, 6, {}).formatmonth()
+        self.assertIn('Czerwiec 2024', html)
+        self.assertIn('>Pon<', html)
+
+    def test_archive_view(self):
+        """Test archive view"""
+        response = self.client.get(reverse('mainapp:archive', args=[2024, 6]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'mainapp/archive.html')
+        self.assertEqual(response.context['total'], 3)
+
+    def test_archive_invalid_month(self):
+        """Test archive view with a month out of range"""
+        response = self.client.get(reverse('mainapp:archive', args=[2024, 13]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_blog_day_view(self):
+        """Test listing filtered by day"""
+        response = self.client.get(reverse('mainapp:blog_day', args=[2024, 6, 3]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+
+# JSON API tests
+@override_settings(CACHES=TEST_CACHES)
+class TestApi(TestCase):
+    """Tests for the read-only realizations API"""
+
+    def setUp(self):
+        """Setup before tests"""
+        cache.clear()
+        date = timezone.make_aware(datetime.datetime(2024, 6, 10, 12))
+        # Two entries share a date to exercise the (date, id) cursor
+        self.realizations = [
+            Realization.objects.create(title=f'Test Title {i}', content=f'Test Content {i}',
+                                       date=date if i < 2 else date - datetime.timedelta(days=i))
+            for i in range(5)
+        ]
+        RealizationImage.objects.create(realization=self.realizations[0], image='realizations_images/a.jpg')
+        RealizationImage.objects.create(realization=self.realizations[0], image='realizations_images/b.jpg')
+        self.list_url = reverse('mainapp:api_realization_list')
+
+    def get_json(self, url, **params):
+        """Fetch a URL and decode its (possibly streamed) JSON body"""
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, json.loads(b''.join(response.streaming_content) if response.streaming else response.content)
+
+    def test_cursor_pagination(self):
+        """Test that following cursors returns every entry exactly once"""
+        ids = []
+        url, params = self.list_url, {'limit': 2}
+        while url:
+            _, data = self.get_json(url, **params)
+            ids.extend(entry['id'] for entry in data['results'])
+            url, params = data['next'], {}
+        expected = list(Realization.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_sparse_fields(self):
+        """Test that only requested fields are returned"""
+        _, data = self.get_json(self.list_url, fields='id,title')
+        self.assertEqual(set(data['results'][0]), {'id', 'title'})
+
+    def test_unknown_field(self):
+        """Test that unknown fields are rejected"""
+        response = self.client.get(self.list_url, {'fields': 'password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_images_single_query(self):
+        """Test that images are loaded with one extra query"""
+        with self.assertNumQueries(2):
+            _, data = self.get_json(self.list_url)
+        entry = next(e for e in data['results'] if e['id'] == self.realizations[0].id)
+        self.assertEqual(len(entry['images']), 2)
+
+    def test_etag_not_modified(self):
+        """Test conditional requests and ETag invalidation"""
+        response, _ = self.get_json(self.list_url)
+        etag = response['ETag']
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Realization.objects.create(title='New', content='New')
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_not_modified_without_queries(self):
+        """Test that a matching ETag is answered from the cache alone"""
+        response, _ = self.get_json(self.list_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_when_version_evicted(self):
+        """Test that a lost content version never leads to a 304 for possibly changed data"""
+        response, _ = self.get_json(self.list_url)
+        cache.clear()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail(self):
+        """Test detail endpoint"""
+        _, data = self.get_json(reverse('mainapp:api_realization_detail', args=[self.realizations[1].id]))
+        self.assertEqual(data['result']['title'], 'Test Title 1')
+        response = self.client.get(reverse('mainapp:api_realization_detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+# Upload-time image optimization tests
+@override_settings(CACHES=TEST_CACHES)
+class TestImageOptimization(TestCase):
+    """Tests for optimization of uploaded photos"""
+
+    def setUp(self):
+        """Setup before tests"""
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root, IMAGE_MAX_DIMENSION=100)
+        self.override.enable()
+
+    def tearDown(self):
+        """Cleanup after tests"""
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_jpeg_rotated_stripped_and_capped(self):
+        """Test that JPEG orientation is applied, metadata removed and size capped"""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+        exif[0x8825] = {2: (52.0, 13.0, 0.0)}  # GPS latitude
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 150), 'red').save(buffer, 'JPEG', exif=exif)
+        upload = SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+        realization = Realization.objects.create(title='Test', content='Test', image=upload)
+
+        with Image.open(realization.image.path) as image:
+            self.assertEqual(image.size, (50, 100))
+            self.assertFalse(image.getexif())
+            self.assertTrue(image.info.get('progressive'))
+
+    def test_png_metadata_stripped(self):
+        """Test that PNG text chunks are removed"""
+        info = PngImagePlugin.PngInfo()
+        info.add_text('Comment', 'secret')
+        buffer = io.BytesIO()
+        Image.new('RGB', (20, 20), 'blue').save(buffer, 'PNG', pnginfo=info)
+        upload = SimpleUploadedFile('screen.png', buffer.getvalue(), content_type='image/png')
+
+        realization = Realization.objects.create(title='Test', content='Test')
+        image = RealizationImage.objects.create(realization=realization, image=upload)
+
+        with Image.open(image.image.path) as stored:
+            self.assertNotIn('Comment', stored.info)
+            self.assertEqual(stored.size, (20, 20))
+
+    def test_png_not_recompressed_during_upload(self):
+        """Test that slow zopfli recompression is left to the optimize_images command"""
+        buffer = io.BytesIO()
+        Image.new('RGB', (20, 20), 'blue').save(buffer, 'PNG')
+        upload = SimpleUploadedFile('screen.png', buffer.getvalue(), content_type='image/png')
+        with mock.patch('zopfli.png.optimize') as recompress:
+            Realization.objects.create(title='Test', content='Test', image=upload)
+        recompress.assert_not_called()
+
+    def test_mpo_stored_as_stripped_jpeg(self):
+        """Test that multi-picture phone photos lose their metadata like plain JPEGs"""
+        exif = Image.Exif()
+        exif[0x8825] = {2: (52.0, 13.0, 0.0)}  # GPS latitude
+        buffer = io.BytesIO()
+        Image.new('RGB', (80, 40), 'red').save(buffer, 'MPO', save_all=True, exif=exif,
+                                               append_images=[Image.new('RGB', (80, 40), 'black')])
+        upload = SimpleUploadedFile('phone.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+        realization = Realization.objects.create(title='Test', content='Test', image=upload)
+
+        with Image.open(realization.image.path) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertFalse(image.getexif())
+
+    def test_optimize_images_command_replaces_original(self):
+        """Test that stored originals are replaced in place by their optimized version"""
+        exif = Image.Exif()
+        exif[0x8825] = {2: (52.0, 13.0, 0.0)}  # GPS latitude
+        os.makedirs(os.path.join(self.media_root, 'realizations_images'))
+        path = os.path.join(self.media_root, 'realizations_images', 'old.jpg')
+        Image.new('RGB', (300, 150), 'red').save(path, exif=exif)
+        Realization.objects.bulk_create([Realization(title='Test', content='Test', image='realizations_images/old.jpg')])
+
+        call_command('optimize_images', stdout=io.StringIO())
+
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['old.jpg'])
+        with Image.open(path) as image:
+            self.assertFalse(image.getexif())
+            self.assertEqual(image.size, (100, 50))
+
+
+# Chunked admin upload tests
+@override_settings(CACHES=TEST_CACHES)
+class TestChunkedUpload(TestCase):
+    """Tests for resumable chunked photo uploads in the admin"""
+
+    def setUp(self):
+        """Setup before tests"""
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root,
+                                          CHUNKED_UPLOAD_DIR=os.path.join(self.media_root, 'partial'),
+                                          CHUNKED_UPLOAD_CHUNK_SIZE=100)
+        self.override.enable()
+        self.user = User.objects.create_superuser(username='admin', password='password')
+        self.client.login(username='admin', password='password')
+        self.realization = Realization.objects.create(title='Test', content='Test')
+        self.url = reverse('admin:mainapp_realization_upload', args=[self.realization.id, 'photo-1'])
+        buffer = io.BytesIO()
+        Image.frombytes('RGB', (16, 16), os.urandom(16 * 16 * 3)).save(buffer, 'PNG')
+        self.data = buffer.getvalue()
+
+    def tearDown(self):
+        """Cleanup after tests"""
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def send(self, start, end):
+        """Post bytes start..end-1 of the test image as one chunk"""
+        return self.client.post(self.url, self.data[start:end], content_type='application/octet-stream',
+                                HTTP_CONTENT_RANGE=f'bytes {start}-{end - 1}/{len(self.data)}',
+                                HTTP_X_FILE_NAME='zdjecie.png')
+
+    def test_upload_in_chunks(self):
+        """Test that chunks are assembled and attached as RealizationImage"""
+        for start in range(0, len(self.data), 100):
+            response = self.send(start, min(start + 100, len(self.data)))
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['complete'])
+        image = RealizationImage.objects.get(realization=self.realization)
+        self.assertTrue(image.image.name.endswith('.png'))
+
+    def test_resume_reports_offset(self):
+        """Test that an out of order chunk is rejected with the current offset"""
+        self.send(0, 100)
+        self.assertEqual(self.client.get(self.url).json()['offset'], 100)
+        response = self.send(0, 100)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 100)
+
+    def test_retry_after_completion(self):
+        """Test that resending the last chunk returns the attached image instead of uploading again"""
+        for start in range(0, len(self.data), 100):
+            response = self.send(start, min(start + 100, len(self.data)))
+        image_id = response.json()['image_id']
+        last = (len(self.data) - 1) // 100 * 100
+        retry = self.send(last, len(self.data))
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json()['image_id'], image_id)
+        self.assertTrue(self.client.get(self.url).json()['complete'])
+        self.assertEqual(RealizationImage.objects.filter(realization=self.realization).count(), 1)
+
+    def test_upload_again_after_photo_deleted(self):
+        """Test that a stale completion marker does not block uploading a deleted photo again"""
+        for start in range(0, len(self.data), 100):
+            self.send(start, min(start + 100, len(self.data)))
+        RealizationImage.objects.filter(realization=self.realization).delete()
+        self.assertEqual(self.client.get(self.url).json(), {'offset': 0})
+        for start in range(0, len(self.data), 100):
+            response = self.send(start, min(start + 100, len(self.data)))
+        self.assertTrue(response.json()['complete'])
+        self.assertEqual(RealizationImage.objects.filter(realization=self.realization).count(), 1)
+
+    @mock.patch('mainapp.uploads.fcntl', None)
+    def test_lock_without_fcntl(self):
+        """Test that uploads lock with msvcrt where fcntl is not available"""
+        with mock.patch('mainapp.uploads.msvcrt', create=True) as msvcrt:
+            with ChunkedUpload(self.realization.id, 'photo-1').locked():
+                self.assertEqual(msvcrt.locking.call_args.args[1], msvcrt.LK_LOCK)
+        self.assertEqual(msvcrt.locking.call_args.args[1], msvcrt.LK_UNLCK)
+
+    def test_change_view_with_invalid_id(self):
+        """Test that a non-numeric object id is handled by the admin instead of failing"""
+        response = self.client.get('/admin/mainapp/realization/abc/change/')
+        self.assertEqual(response.status_code, 302)
+
+    def test_requires_staff(self):
+        """Test that anonymous users cannot upload"""
+        self.client.logout()
+        response = self.send(0, 100)
+        self.assertEqual(response.status_code, 302)
+
+
+# Preload and Early Hints tests
+@override_settings(CACHES=TEST_CACHES)
+class TestPreloadHints(TestCase):
+    """Tests for Link preload headers and 103 Early Hints"""
+
+    def test_blog_preloads_first_image(self):
+        """Test that the blog page preloads CSS, JS and the first image"""
+        Realization.objects.create(title='Test', content='Test', image='realizations_images/a.jpg')
+        response = self.client.get(reverse('mainapp:blog'))
+        self.assertIn('as=style', response['Link'])
+        self.assertIn('as=script', response['Link'])
+        self.assertIn(f'; integrity="{css_url()["integrity"]}"', response['Link'])
+        self.assertNotIn('bootstrap/4', response['Link'])
+        self.assertIn('</media/realizations_images/a.jpg>; rel=preload; as=image', response['Link'])
+
+    def test_detail_preloads_carousel_image(self):
+        """Test that the detail page preloads the first carousel image"""
+        realization = Realization.objects.create(title='Test', content='Test')
+        RealizationImage.objects.create(realization=realization, image='realizations_images/b.jpg')
+        response = self.client.get(reverse('mainapp:detail', args=[realization.id]))
+        self.assertIn('</media/realizations_images/b.jpg>; rel=preload; as=image', response['Link'])
+
+    def test_early_hints_replayed(self):
+        """Test that the Link header of a response is sent as an early hint on the next request"""
+        async def app(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'link', b'</a.css>; rel=preload; as=style')]})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        middleware = EarlyHintsMiddleware(app)
+        scope = {'type': 'http', 'method': 'GET', 'path': '/blog/', 'query_string': b'',
+                 'extensions': {'http.response.early_hint': {}}}
+
+        async def request():
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+            await middleware(scope, None, send)
+            return messages
+
+        self.assertEqual(asyncio.run(request())[0]['type'], 'http.response.start')
+        hint = asyncio.run(request())[0]
+        self.assertEqual(hint, {'type': 'http.response.early_hint',
+                                'links': [b'</a.css>; rel=preload; as=style']})
+
+
+# Sessionless fast path tests
+@override_settings(CACHES=TEST_CACHES)
+class TestSessionlessFastPath(TestCase):
+    """Tests for skipping session, auth and messages on public pages"""
+
+    def test_anonymous_blog_is_sessionless(self):
+        """Test that anonymous public page views do not use the session"""
+        response = self.client.get(reverse('mainapp:blog'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(is_sessionless(response.wsgi_request))
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_logged_in_user_keeps_session(self):
+        """Test that requests with a session cookie are processed normally"""
+        User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('mainapp:blog'))
+        self.assertFalse(is_sessionless(response.wsgi_request))
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+
+    def test_contact_message_shown_after_redirect(self):
+        """Test that a flash message set on a POST is still displayed on the public page"""
+        with self.settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+            response = self.client.post(reverse('mainapp:contact'), {
+                'first_name': 'John', 'last_name': 'Doe',
+                'email': 'john.doe@example.com', 'message': 'Test message'}, follow=True)
+        self.assertContains(response, 'Wiadomość została wysłana.')
+
+
+# Database router tests
+@override_settings(CACHES=TEST_CACHES, DATABASE_REPLICAS=['replica'])
+class TestDatabaseRouter(TestCase):
+    """Tests for the primary/replica database router"""
+
+    def setUp(self):
+        """Setup before tests"""
+        self.router = PrimaryReplicaRouter()
+
+    def route_read(self, state):
+        """Return the alias chosen for a read within the given routing state"""
+        token = routing_state.set(state)
+        try:
+            return self.router.db_for_read(Realization)
+        finally:
+            routing_state.reset(token)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Test that reads without a request context go to the primary"""
+        self.assertEqual(self.router.db_for_read(Realization), 'default')
+
+    @mock.patch('mainapp.routers.connections')
+    @mock.patch('mainapp.routers.replica_is_healthy', return_value=True)
+    def test_public_reads_use_replica(self, healthy, connections):
+        """Test that reads of public pages go to a healthy replica"""
+        self.assertEqual(self.route_read(RoutingState(use_replica=True)), 'replica')
+        self.assertEqual(self.route_read(RoutingState(use_replica=False)), 'default')
+
+    @mock.patch('mainapp.routers.replica_is_healthy', return_value=True)
+    def test_unreachable_replica_fails_over(self, healthy):
+        """Test that a replica that cannot be connected to is skipped despite a recent health check"""
+        try:
+            self.assertEqual(self.route_read(RoutingState(use_replica=True)), 'default')
+        finally:
+            healthy, _ = _health.pop('replica')
+        self.assertFalse(healthy)
+
+    @mock.patch('mainapp.routers.replica_is_healthy', return_value=True)
+    def test_reads_after_write_use_primary(self, healthy):
+        """Test that a request reads its own writes from the primary"""
+        state = RoutingState(use_replica=True)
+        token = routing_state.set(state)
+        try:
+            self.assertEqual(self.router.db_for_write(Realization), 'default')
+        finally:
+            routing_state.reset(token)
+        self.assertEqual(self.route_read(state), 'default')
+
+    def test_unhealthy_replica_fails_over(self):
+        """Test that an unreachable replica is skipped"""
+        self.assertEqual(self.route_read(RoutingState(use_replica=True)), 'default')
+
+    @mock.patch('mainapp.routers.replica_is_healthy', return_value=True)
+    def test_archive_counts_read_primary(self, healthy):
+        """Test that counts cached without expiry are not read from a lagging replica"""
+        token = routing_state.set(RoutingState(use_replica=True))
+        try:
+            with mock.patch.object(PrimaryReplicaRouter, 'db_for_read') as db_for_read:
+                compute_day_counts(2024, 1)
+        finally:
+            routing_state.reset(token)
+        db_for_read.assert_not_called()
+
+    def test_api_reads_primary_after_change(self):
+        """Test that API bodies are read from the primary while the last change may not be replicated"""
+        request = RequestFactory().get(reverse('mainapp:api_realization_list'))
+        state = RoutingState(use_replica=True)
+        token = routing_state.set(state)
+        try:
+            cache.clear()
+            realization_etag(request)
+            self.assertTrue(state.use_replica)
+            bump_content_version()
+            realization_etag(request)
+        finally:
+            routing_state.reset(token)
+        self.assertFalse(state.use_replica)
+
+    def test_failed_replica_query_marks_unhealthy(self):
+        """Test that a query failing on a replica takes it out of rotation and flags the request"""
+        def execute(sql, params, many, context):
+            raise OperationalError('database is locked')
+
+        state = RoutingState(use_replica=True)
+        token = routing_state.set(state)
+        try:
+            with self.assertRaises(OperationalError):
+                replica_query_guard(execute, 'SELECT 1', None, False, {'connection': mock.Mock(alias='replica')})
+        finally:
+            routing_state.reset(token)
+            healthy, _ = _health.pop('replica')
+        self.assertFalse(healthy)
+        self.assertTrue(state.failed)
+        self.assertEqual(self.route_read(state), 'default')
+
+    def test_failed_replica_request_retried_on_primary(self):
+        """Test that a read-only request failing on a replica is repeated on the primary"""
+        states = []
+
+        def get_response(request):
+            state = routing_state.get()
+            states.append(state.use_replica)
+            if state.use_replica:
+                state.failed = True
+                return HttpResponse(status=500)
+            return HttpResponse()
+
+        request = RequestFactory().get(reverse('mainapp:blog'))
+        response = DatabaseRoutingMiddleware(get_response)(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(states, [True, False])
+
+    def test_write_sets_sticky_cookie(self):
+        """Test that a request writing to the primary keeps the client on it"""
+        User.objects.create_superuser(username='admin', password='password')
+        response = self.client.post(reverse('admin:login'), {'username': 'admin', 'password': 'password'})
+        self.assertIn(PRIMARY_STICKY_COOKIE, response.cookies)
+        response = self.client.get(reverse('mainapp:blog'))
+        self.assertNotIn(PRIMARY_STICKY_COOKIE, response.cookies)
+
+
 class MockRequest:
     pass
 
 
 # Admin PDF export tests
+@override_settings(CACHES=TEST_CACHES)
 class AdminExportPDFTest(TestCase):
     """Tests for PDF export through admin panel"""
     def test_realization_export_to_pdf(self):
@@ -162,7 +747,62 @@ class AdminExportPDFTest(TestCase):
         self.assertIn('attachment; filename="database_report.pdf"', response['Content-Disposition'])
 
 
+# Admin PDF catalogue tests
+@override_settings(CACHES=TEST_CACHES)
+class AdminExportCatalogueTest(TestCase):
+    """Tests for the illustrated PDF catalogue export"""
+
+    def setUp(self):
+        """Setup before tests"""
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root, THUMBNAIL_WORKERS=2,
+                                          THUMBNAIL_CACHE_DIR=os.path.join(self.media_root, 'thumbnails'))
+        self.override.enable()
+        self.realization_admin = RealizationAdmin(Realization, AdminSite())
+        os.makedirs(os.path.join(self.media_root, 'realizations_images'))
+        for name, color in (('main.jpg', 'red'), ('extra.jpg', 'blue')):
+            Image.new('RGB', (3000, 2000), color).save(os.path.join(self.media_root, 'realizations_images', name))
+        realization = Realization.objects.create(title='Dach', content='Opis\nrealizacji',
+                                                 image='realizations_images/main.jpg')
+        # The main image is also in the gallery and must be embedded once
+        RealizationImage.objects.create(realization=realization, image='realizations_images/main.jpg')
+        RealizationImage.objects.create(realization=realization, image='realizations_images/extra.jpg')
+
+    def tearDown(self):
+        """Cleanup after tests"""
+        self.override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_catalogue_embeds_each_image_once(self):
+        """Test exporting an illustrated catalogue"""
+        response = self.realization_admin.export_catalogue_to_pdf(MockRequest(), Realization.objects.all())
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('filename="catalogue.pdf"', response['Content-Disposition'])
+        self.assertEqual(response.content.count(b'/Subtype /Image'), 2)
+
+    def test_long_title_wrapped(self):
+        """Test that a long title is split into lines fitting the page"""
+        realization = Realization(title='Kompleksowy remont ' * 5, content='', date=timezone.now())
+        page = mock.Mock()
+        self.realization_admin.draw_catalogue_entry(page, realization, None, [], {})
+        width = letter[0] - 2 * CATALOGUE_MARGIN
+        title = [call.args[2] for call in page.drawString.call_args_list][:-2]
+        self.assertGreater(len(title), 1)
+        for line in title:
+            self.assertLessEqual(pdfmetrics.stringWidth(line, 'Calibri', 18), width)
+
+    def test_thumbnails_cached_on_disk(self):
+        """Test that a second export reuses the thumbnail cache"""
+        self.realization_admin.export_catalogue_to_pdf(MockRequest(), Realization.objects.all())
+        thumbnails = [name for _, _, files in os.walk(os.path.join(self.media_root, 'thumbnails')) for name in files]
+        self.assertEqual(len(thumbnails), 2)
+        with mock.patch('mainapp.images.build_thumbnail') as build:
+            self.realization_admin.export_catalogue_to_pdf(MockRequest(), Realization.objects.all())
+        build.assert_not_called()
+
+
 # ContactForm tests
+@override_settings(CACHES=TEST_CACHES)
 class TestContactForm(TestCase):
     """Tests for ContactForm"""
 
@@ -0,0 +1,40 @@
+from django.utils.html import linebreaks
+
+# Maximum length of a realization excerpt, without the ellipsis
+EXCERPT_LENGTH = 300
+
+
+def content_to_html(content):
+    """
+    Render realization content the way the ``linebreaks`` template filter does.
+
+    Args:
+        content (str): Plain text content.
+
+    Returns:
+        str: Escaped HTML with paragraphs and line breaks.
+    """
+    return linebreaks(content or '', autoescape=True)
+
+
+def make_excerpt(content, length=EXCERPT_LENGTH):
+    """
+    Shorten content to at most ``length`` characters, cutting at a word boundary.
+
+    Whitespace, including line breaks, is collapsed to single spaces.
+
+    Args:
+        content (str): Plain text content.
+        length (int): Maximum length before the ellipsis.
+
+    Returns:
+        str: The excerpt, ending with an ellipsis if it was shortened.
+    """
+    text = ' '.join((content or '').split())
+    if len(text) <= length:
+        return text
+    cut = text[:length + 1].rsplit(' ', 1)[0]
+    if len(cut) > length:
+        # A single word longer than the limit
+        cut = text[:length]
+    return cut.rstrip(' .,;:-') + '…'
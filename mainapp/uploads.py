@@ -0,0 +1,266 @@
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .models import RealizationImage
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+UPLOAD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+# Size of blocks copied from the request to disk
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """
+    A chunk that cannot be accepted.
+
+    Attributes:
+        status (int): HTTP status to report.
+        offset (int): Number of bytes the server already has.
+    """
+    def __init__(self, message, status=400, offset=0):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def parse_content_range(header):
+    """
+    Parse a ``Content-Range: bytes start-end/total`` header.
+
+    Returns:
+        tuple: (start, end, total) with ``end`` inclusive.
+
+    Raises:
+        UploadError: If the header is missing or malformed.
+    """
+    match = CONTENT_RANGE_PATTERN.match(header or '')
+    if not match:
+        raise UploadError("Brak lub niepoprawny nagłówek Content-Range")
+    start, end, total = (int(value) for value in match.groups())
+    if start > end or end >= total:
+        raise UploadError("Niepoprawny zakres")
+    return start, end, total
+
+
+def lock_file(fd):
+    """Block until the process holds an exclusive lock on the open file ``fd``."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    while True:
+        try:
+            # Retries for about 10 seconds before giving up
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            pass
+
+
+def unlock_file(fd):
+    """Release the lock taken with :func:`lock_file`."""
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return
+    os.lseek(fd, 0, os.SEEK_SET)
+    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def remove_stale_uploads():
+    """Delete partial uploads untouched for longer than ``CHUNKED_UPLOAD_EXPIRY`` seconds."""
+    root = settings.CHUNKED_UPLOAD_DIR
+    if not os.path.isdir(root):
+        return
+    deadline = time.time() - settings.CHUNKED_UPLOAD_EXPIRY
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+class ChunkedUpload:
+    """
+    A file being uploaded in consecutive chunks and assembled on disk.
+
+    The client chooses the upload id (e.g. from the file name, size and
+    modification time), so after a dropped connection it can ask for the
+    current offset and continue from there. Once the file is attached, a
+    completion marker keeps answering retries with the created image, so a
+    lost final response does not start the upload again.
+
+    Requests for the same upload must hold ``locked()`` while they read or
+    change its state.
+
+    Attributes:
+        realization_id (int): Realization the photo will be attached to.
+        upload_id (str): Client-chosen identifier of the upload.
+    """
+    def __init__(self, realization_id, upload_id):
+        if not UPLOAD_ID_PATTERN.match(upload_id):
+            raise UploadError("Niepoprawny identyfikator przesyłania")
+        self.realization_id = realization_id
+        self.upload_id = upload_id
+        directory = os.path.join(settings.CHUNKED_UPLOAD_DIR, str(realization_id))
+        self.path = os.path.join(directory, f'{upload_id}.part')
+        self.meta_path = os.path.join(directory, f'{upload_id}.json')
+        self.done_path = os.path.join(directory, f'{upload_id}.done')
+        self.lock_path = os.path.join(directory, f'{upload_id}.lock')
+
+    @contextmanager
+    def locked(self):
+        """Hold an exclusive lock on the upload, serializing concurrent requests for it."""
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT)
+        try:
+            lock_file(fd)
+            try:
+                # Keep the lock file from being removed as stale while in use
+                os.utime(self.lock_path)
+                yield
+            finally:
+                unlock_file(fd)
+        finally:
+            os.close(fd)
+
+    @property
+    def offset(self):
+        """Number of bytes received so far."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def read_meta(self):
+        """
+        Return the file name and total size recorded with the first chunk.
+
+        Returns:
+            dict: Metadata or None if the upload has not started.
+        """
+        try:
+            with open(self.meta_path) as meta:
+                return json.load(meta)
+        except (OSError, ValueError):
+            return None
+
+    def read_done(self):
+        """
+        Return the completion marker of an attached upload.
+
+        Returns:
+            dict: ``image_id`` and ``size`` or None if the upload is not finished.
+        """
+        try:
+            with open(self.done_path) as done:
+                return json.load(done)
+        except (OSError, ValueError):
+            return None
+
+    def mark_done(self, image_id):
+        """Record that the upload was attached as the image with ``image_id``."""
+        done = {'image_id': image_id, 'size': self.read_meta()['size']}
+        partial = f'{self.done_path}.tmp'
+        with open(partial, 'w') as done_file:
+            json.dump(done, done_file)
+        os.replace(partial, self.done_path)
+
+    def status(self):
+        """
+        Describe the upload for the client.
+
+        Returns:
+            dict: ``offset``, plus ``complete`` and ``image_id`` once attached.
+        """
+        done = self.read_done()
+        if done is not None and not RealizationImage.objects.filter(pk=done['image_id']).exists():
+            # The photo was deleted since; the same file can be uploaded again
+            os.remove(self.done_path)
+            done = None
+        if done is not None:
+            return {'offset': done['size'], 'complete': True, 'image_id': done['image_id']}
+        return {'offset': self.offset}
+
+    @property
+    def is_complete(self):
+        """Whether all bytes announced with the first chunk have arrived."""
+        meta = self.read_meta()
+        return meta is not None and self.offset == meta['size']
+
+    def write_chunk(self, stream, content_range, name):
+        """
+        Append a chunk read from ``stream`` to the partial file.
+
+        Args:
+            stream: File-like object with the chunk body (the request).
+            content_range (str): Value of the Content-Range header.
+            name (str): Original file name, required with the first chunk.
+
+        Returns:
+            int: New offset.
+
+        Raises:
+            UploadError: If the chunk does not continue the upload.
+        """
+        start, end, total = parse_content_range(content_range)
+        if total > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise UploadError("Plik jest za duży", status=413)
+        if end - start + 1 > settings.CHUNKED_UPLOAD_CHUNK_SIZE:
+            raise UploadError("Fragment jest za duży", status=413)
+
+        meta = self.read_meta()
+        if meta is None:
+            if start != 0:
+                raise UploadError("Przesyłanie nie zostało rozpoczęte", status=409)
+            if not name:
+                raise UploadError("Brak nazwy pliku")
+            remove_stale_uploads()
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            meta = {'name': os.path.basename(name), 'size': total}
+            with open(self.meta_path, 'w') as meta_file:
+                json.dump(meta, meta_file)
+            open(self.path, 'wb').close()
+        elif meta['size'] != total:
+            raise UploadError("Rozmiar pliku nie zgadza się z rozpoczętym przesyłaniem")
+
+        offset = self.offset
+        if start != offset:
+            # Already stored or out of order; the client continues from our offset
+            raise UploadError("Niezgodny początek fragmentu", status=409, offset=offset)
+
+        remaining = end - start + 1
+        with open(self.path, 'ab') as part:
+            while remaining:
+                block = stream.read(min(COPY_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                part.write(block)
+                remaining -= len(block)
+        if remaining:
+            # Connection dropped mid-chunk; the bytes received are kept and the client resumes after them
+            raise UploadError("Niekompletny fragment", offset=self.offset)
+        return self.offset
+
+    def discard(self):
+        """Remove the partial file and its metadata, keeping the completion marker."""
+        for path in (self.path, self.meta_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
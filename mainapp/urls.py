@@ -2,7 +2,7 @@
 
 from django.urls import path
 
-from . import views
+from . import api, views
 
 app_name = 'budowlanka_project'
 urlpatterns = [
@@ -12,9 +12,19 @@ urlpatterns = [
     # Blog page
     path('blog/', views.blog, name='blog'),
 
+    # Month calendar of realizations
+    path('blog/archiwum/<int:year>/<int:month>/', views.archive, name='archive'),
+
+    # Realizations added on a given day
+    path('blog/archiwum/<int:year>/<int:month>/<int:day>/', views.blog, name='blog_day'),
+
     # Detail page for a single entry on blog
     path('blog/<int:entry_id>/', views.detail, name='detail'),
 
     # Contact page
     path('kontakt/', views.contact, name='contact'),
+
+    # Read-only JSON API
+    path('api/v1/realizations/', api.realization_list, name='api_realization_list'),
+    path('api/v1/realizations/<int:entry_id>/', api.realization_detail, name='api_realization_detail'),
 ]
@@ -1,3 +1,4 @@
+import datetime
 import logging
 from calendar import HTMLCalendar
 
@@ -7,11 +8,15 @@ from django.core.mail import send_mail
 from django.core.paginator import Paginator
 from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.dates import MONTHS, WEEKDAYS_ABBR
 from django.utils.safestring import mark_safe
 from django.views.decorators.http import require_http_methods
 
+from .archive import day_bounds, get_day_counts
 from .forms import ContactForm
+from .hints import add_preload_header
 from .models import Realization, RealizationImage
 
 # Get an instance of a logger
@@ -36,24 +41,93 @@ def index(request):
         return render(request, 'mainapp/error.html', {'error': str(e)})
 
 
-def blog(request):
+class CalendarView(HTMLCalendar):
+    """
+    Month calendar marking days with realizations.
+
+    Month and weekday names come from Django's translations for the active
+    language; ``LocaleHTMLCalendar`` would need the matching OS locale and
+    switches it for the whole process.
+
+    Attributes:
+        year (int): Displayed year.
+        month (int): Displayed month.
+        counts (dict): Number of realizations per day of the month.
+    """
+    def __init__(self, year, month, counts):
+        super().__init__()
+        self.year = year
+        self.month = month
+        self.counts = counts
+
+    def formatday(self, day, weekday):
+        """
+        Return a day cell, linking to the day's listing when it has realizations.
+        """
+        if day == 0:
+            return '<td class="noday">&nbsp;</td>'
+        count = self.counts.get(day)
+        if not count:
+            return f'<td class="{self.cssclasses[weekday]}">{day}</td>'
+        url = reverse('mainapp:blog_day', args=[self.year, self.month, day])
+        return (f'<td class="{self.cssclasses[weekday]} has-realizations">'
+                f'<a href="{url}">{day}</a> <span class="badge bg-secondary">{count}</span></td>')
+
+    def formatweekday(self, day):
+        """
+        Return a weekday name as a table header.
+        """
+        return f'<th class="{self.cssclasses_weekday_head[day]}">{WEEKDAYS_ABBR[day]}</th>'
+
+    def formatmonthname(self, theyear, themonth, withyear=True):
+        """
+        Return the month name as a table row.
+        """
+        name = f'{MONTHS[themonth]} {theyear}' if withyear else MONTHS[themonth]
+        return f'<tr><th colspan="7" class="{self.cssclass_month_head}">{name}</th></tr>'
+
+    def formatmonth(self, withyear=True):
+        """
+        Return the displayed month as an HTML table.
+        """
+        return super().formatmonth(self.year, self.month, withyear=withyear)
+
+
+def blog(request, year=None, month=None, day=None):
     """
     Show all entries and main image (if it exists).
 
     Args:
         request (HttpRequest): The request object.
+        year (int, optional): Year of the archive day to filter by.
+        month (int, optional): Month of the archive day to filter by.
+        day (int, optional): Day of the month to filter by.
 
     Returns:
         HttpResponse: The rendered blog page with paginated entries.
     """
     try:
-        entries = Realization.objects.all()
+        # The listing shows the stored excerpt; skip the full text
+        entries = Realization.objects.defer('content', 'content_html')
+        archive_day = None
+        if day is not None:
+            try:
+                archive_day = datetime.date(year, month, day)
+            except ValueError:
+                raise Http404("Niepoprawna data")
+            start, end = day_bounds(archive_day)
+            entries = entries.filter(date__gte=start, date__lt=end)
         paginator = Paginator(entries, 10)  # Paginate with 10 entries per page
         page_number = request.GET.get('page')
         page_obj = paginator.get_page(page_number)
-        context = {'page_obj': page_obj}
+        context = {'page_obj': page_obj, 'archive_day': archive_day}
         logger.debug("Pobrano część wpisów")
-        return render(request, 'mainapp/blog.html', context=context)
+        response = render(request, 'mainapp/blog.html', context=context)
+        # Preload the first image shown on the page
+        first_image = next((entry.image.url for entry in page_obj if entry.image), None)
+        return add_preload_header(response, first_image)
+    except Http404:
+        raise
     except Realization.DoesNotExist:
         logger.error("Żadne wpisy nie istnieją")
         raise Http404("Żaden wpis nie istnieje")
@@ -62,6 +136,39 @@ def blog(request):
         return render(request, 'mainapp/error.html', {'error': str(e)})
 
 
+def archive(request, year, month):
+    """
+    Show a month calendar of realizations with links to daily listings.
+
+    Args:
+        request (HttpRequest): The request object.
+        year (int): The displayed year.
+        month (int): The displayed month.
+
+    Returns:
+        HttpResponse: The rendered archive page.
+    """
+    if not 1 <= month <= 12 or not datetime.MINYEAR < year < datetime.MAXYEAR:
+        raise Http404("Niepoprawny miesiąc")
+    try:
+        counts = get_day_counts(year, month)
+        calendar = CalendarView(year, month, counts)
+        first_day = datetime.date(year, month, 1)
+        previous_month = first_day - datetime.timedelta(days=1)
+        next_month = first_day + datetime.timedelta(days=31)
+        context = {
+            'calendar': mark_safe(calendar.formatmonth()),
+            'total': sum(counts.values()),
+            'previous_month': previous_month,
+            'next_month': next_month,
+        }
+        logger.debug(f"Archiwum dla {year}-{month:02d}")
+        return render(request, 'mainapp/archive.html', context)
+    except Exception as e:
+        logger.error(f"Błąd w archiwum dla {year}-{month:02d}: {e}")
+        return render(request, 'mainapp/error.html', {'error': str(e)})
+
+
 @require_http_methods(["GET", "POST"])
 def detail(request, entry_id):
     """
@@ -76,11 +183,13 @@ def detail(request, entry_id):
     """
     try:
         entry = get_object_or_404(Realization, pk=entry_id)
-        images = RealizationImage.objects.filter(realization=entry)
+        images = list(RealizationImage.objects.filter(realization=entry))
 
         context = {'entry': entry, 'images': images}
         logger.debug(f"Widok szczegółowy dla realizacji {entry_id}")
-        return render(request, 'mainapp/detail.html', context)
+        response = render(request, 'mainapp/detail.html', context)
+        # Preload the first carousel image
+        return add_preload_header(response, images[0].image.url if images else None)
     except Realization.DoesNotExist:
         logger.error(f"Realizacja o id {entry_id} nie istnieje")
         raise Http404("Podany wpis nie istnieje")